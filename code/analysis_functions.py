@@ -1,10 +1,95 @@
 # imports
+import warnings
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+from numpy.lib.stride_tricks import sliding_window_view
 from statsmodels.tsa.seasonal import STL
 
 
+# Feature names produced per column by extract_features_df, in output order
+_FEATURES = [
+    "mean", "std", "mad", "q25", "q75", "iqr",
+    "z_abs", "anomaly_rate", "rz_abs",
+    "vol_rolling", "vol_ewma",
+    "acf1", "acf2",
+    "lag24", "lag168", "lag24_delta", "lag168_delta",
+    "dow_hour_z",
+    "mean_shift",
+]
+
+
+def _window_matrix(values, w):
+    """
+    Return a read-only (T - w + 1, C, w) view of all full windows of the
+    (T, C) array `values`.
+
+    Empty (0, C, w) when the series is shorter than the window.
+    """
+    if len(values) < w:
+        return np.empty((0,) + values.shape[1:] + (w,))
+    return sliding_window_view(values, w, axis=0)
+
+
+def _right_align(values, n):
+    """
+    Pad per-window results with leading NaNs so that each value sits on the
+    last timestamp of its window (same alignment as `DataFrame.rolling`).
+    """
+    out = np.full((n,) + values.shape[1:], np.nan)
+    out[n - len(values):] = values
+    return out
+
+
+def _sorted_quantile(S, q):
+    """
+    Linearly interpolated quantile `q` along the last axis of the window
+    matrix `S`, already sorted along that axis (same as `np.quantile`).
+
+    NaNs sort last, so windows containing a NaN yield NaN.
+    """
+    w = S.shape[-1]
+    pos = q * (w - 1)
+    lo = int(np.floor(pos))
+    hi = min(lo + 1, w - 1)
+    frac = pos - lo
+    out = S[..., lo] + frac * (S[..., hi] - S[..., lo])
+    out[np.isnan(S[..., -1])] = np.nan
+    return out
+
+
+def _shift(values, k):
+    """
+    Shift a (T, C) array down by `k` rows, filling with NaN (like `shift(k)`).
+    """
+    out = np.full(values.shape, np.nan)
+    if k < len(values):
+        out[k:] = values[:len(values) - k]
+    return out
+
+
+def _window_autocorr(W, lag):
+    """
+    Lag-`lag` autocorrelation of every window in the window matrix `W`.
+
+    Matches `pd.Series(window).autocorr(lag)`: closed-form Pearson
+    correlation of the w - lag pairs (x[t], x[t - lag]) inside each window.
+    Windows containing a NaN or with zero spread yield NaN.
+    """
+    m = W.shape[-1] - lag
+    if m < 2:
+        return np.full(W.shape[:-1], np.nan)
+
+    a = W[..., lag:]
+    b = W[..., :m]
+    a = a - a.mean(axis=-1, keepdims=True)
+    b = b - b.mean(axis=-1, keepdims=True)
+    var_a = (a * a).sum(axis=-1)
+    var_b = (b * b).sum(axis=-1)
+    out = (a * b).sum(axis=-1) / np.sqrt(var_a * var_b)
+    out[~((var_a > 0) & (var_b > 0))] = np.nan
+    return out
+
+
 def extract_features_df(
     df,
     w=24,
@@ -14,6 +99,9 @@ def extract_features_df(
     """
     Extract rolling time-series features from a pandas DataFrame.
 
+    All columns are processed at once on the (T, C) array; every feature
+    below is a (T, C) block.
+
     Parameters
     ----------
     df : pd.DataFrame
@@ -29,51 +117,70 @@ def extract_features_df(
     Returns
     -------
     features : pd.DataFrame
-        Feature table aligned on time.
+        Feature table aligned on time (float32), columns named
+        "{col}_{feature}".
     """
 
-    features = []
+    A = df.to_numpy(dtype=np.float64)
+    D = pd.DataFrame(A, index=df.index)
+    n = len(A)
 
-    for col in df.columns:
-        s = df[col].astype(float)
-        f = pd.DataFrame(index=s.index)
+    # (T - w + 1, C, w) view of every full window
+    W = _window_matrix(A, w)
 
-        roll = s.rolling(w)
+    f = {}
 
+    with np.errstate(divide="ignore", invalid="ignore"):
         # -----------------------
         # Level & dispersion
         # -----------------------
-        f["mean"] = roll.mean()
-        f["std"] = roll.std()
+        # Every window reducer below reads the same window matrix W;
+        # one sort serves the median, both quartiles and constant-run checks
+        S = np.sort(W, axis=-1)
+
+        mean = W.mean(axis=-1)
+        centered = W - mean[..., None]
+        std = np.sqrt((centered * centered).sum(axis=-1) / (w - 1))
+
+        # Constant windows (flat or capped prices): use the exact value and
+        # zero spread, as rolling().mean()/std() do, instead of the
+        # rounding noise of the sums (NaN windows compare unequal).
+        # A single-value window keeps its undefined (NaN) std.
+        const = S[..., 0] == S[..., -1]
+        mean[const] = S[..., 0][const]
+        if w > 1:
+            std[const] = 0.0
+
+        f["mean"] = _right_align(mean, n)
+        f["std"] = _right_align(std, n)
+
+        med = _sorted_quantile(S, 0.5)
 
         # Robust MAD
-        f["mad"] = roll.apply(
-            lambda x: np.median(np.abs(x - np.median(x))),
-            raw=True
-        )
+        mad = np.median(np.abs(W - med[..., None]), axis=-1)
+        med = _right_align(med, n)
+        f["mad"] = _right_align(mad, n)
 
         # -----------------------
         # Rolling quantiles for robust spike detection
         # -----------------------
-        f["q25"] = roll.quantile(0.25)
-        f["q75"] = roll.quantile(0.75)
+        f["q25"] = _right_align(_sorted_quantile(S, 0.25), n)
+        f["q75"] = _right_align(_sorted_quantile(S, 0.75), n)
         f["iqr"] = f["q75"] - f["q25"]
 
         # -----------------------
         # Anomalies
         # -----------------------
-        z = (s - f["mean"]) / f["std"]
-        f["z_abs"] = z.abs()
+        z = (A - f["mean"]) / f["std"]
+        f["z_abs"] = np.abs(z)
 
-        f["anomaly_rate"] = (
-            z.abs()
-             .rolling(w)
-             .apply(lambda x: (x > z_thr).mean(), raw=True)
-        )
+        # Rolling mean of the 0/1 exceedance mask (NaN where |z| is NaN)
+        exceed = np.where(np.isnan(f["z_abs"]), np.nan, f["z_abs"] > z_thr)
+        f["anomaly_rate"] = pd.DataFrame(exceed).rolling(w).mean().to_numpy()
 
         # Robust z-score (MAD)
-        rz = (s - roll.median()) / (1.4826 * f["mad"])
-        f["rz_abs"] = rz.abs()
+        rz = (A - med) / (1.4826 * f["mad"])
+        f["rz_abs"] = np.abs(rz)
 
         # -----------------------
         # Volatility
@@ -81,62 +188,242 @@ def extract_features_df(
         f["vol_rolling"] = f["std"]
 
         f["vol_ewma"] = (
-            s.sub(s.mean())
+            D.sub(D.mean())
              .abs()
              .ewm(alpha=ewma_alpha)
              .mean()
+             .to_numpy()
         )
 
         # -----------------------
         # Temporal structure & Lags
         # -----------------------
-        f["acf1"] = roll.apply(
-            lambda x: pd.Series(x).autocorr(lag=1)
-        )
-
-        f["acf2"] = roll.apply(
-            lambda x: pd.Series(x).autocorr(lag=2)
-        )
+        f["acf1"] = _right_align(_window_autocorr(W, 1), n)
+        f["acf2"] = _right_align(_window_autocorr(W, 2), n)
 
         # Lag features (day and week)
-        f["lag24"] = s.shift(24)
-        f["lag168"] = s.shift(168)
-        f["lag24_delta"] = s.diff(24)
-        f["lag168_delta"] = s.diff(168)
+        f["lag24"] = _shift(A, 24)
+        f["lag168"] = _shift(A, 168)
+        f["lag24_delta"] = A - f["lag24"]
+        f["lag168_delta"] = A - f["lag168"]
 
         # -----------------------
         # Day-of-week / hour-of-day normalized anomalies
         # -----------------------
-        # Group by (weekday, hour) and compute baseline mean/std from rolling window
-        dow_hour = s.index.to_series().apply(
-            lambda t: (t.weekday(), t.hour)
-        )
-        f["dow_hour_z"] = 0.0  # placeholder
-
-        for (dow, hod), idx_group in s.groupby(dow_hour).groups.items():
-            if len(idx_group) > 1:
-                group_vals = s.loc[idx_group]
-                group_mean = group_vals.mean()
-                group_std = group_vals.std()
-                if group_std > 0:
-                    f.loc[idx_group, "dow_hour_z"] = (
-                        (s.loc[idx_group] - group_mean) / group_std
-                    )
+        # Group by (weekday, hour) and compute baseline mean/std per slot
+        dow = df.index.weekday.to_numpy(dtype=np.int8)
+        hod = df.index.hour.to_numpy(dtype=np.int8)
+        key = dow.astype(np.int16) * 24 + hod
+        key = pd.Categorical.from_codes(key, categories=range(168))
+        g = D.groupby(key, observed=True)
+        mu = g.transform("mean").to_numpy()
+        sd = g.transform("std").to_numpy()
+        f["dow_hour_z"] = np.where(sd > 0, (A - mu) / sd, 0.0)
 
         # -----------------------
         # Regime / change proxy
         # -----------------------
-        f["mean_shift"] = f["mean"].diff().abs()
+        f["mean_shift"] = np.abs(f["mean"] - _shift(f["mean"], 1))
 
-        # Prefix column names
-        f.columns = [f"{col}_{c}" for c in f.columns]
+    # Write each feature into its slot of a preallocated (T, C, F) table.
+    # Computed in float64, stored as float32 to halve the table size.
+    out = np.empty((n, A.shape[1], len(_FEATURES)), dtype=np.float32)
+    for k, name in enumerate(_FEATURES):
+        out[:, :, k] = f[name]
 
-        features.append(f)
+    # (T, C, F) -> (T, C * F) view, columns grouped by signal then feature.
+    # Wrapped without copying: the frame is one C-contiguous float32 block.
+    columns = [f"{col}_{name}" for col in df.columns for name in _FEATURES]
 
-    features = pd.concat(features, axis=1)
+    features = pd.DataFrame(
+        out.reshape(n, -1), index=df.index, columns=columns, copy=False
+    )
 
     return features
 
+
+def _stl_resid(s, period):
+    """
+    Robust STL residuals of a single series.
+    """
+    return STL(s, period=period, robust=True).fit().resid
+
+
+def _normalize_frame(df, tz):
+    """
+    Return `df` as a DataFrame with its DatetimeIndex in timezone `tz`.
+    """
+    if isinstance(df, pd.Series):
+        df = df.to_frame(name=getattr(df, "name", "value"))
+
+    if df.index.tz is None:
+        df = df.tz_localize(tz)
+    else:
+        df = df.tz_convert(tz)
+
+    return df
+
+
+def _day_bounds(day, tz):
+    """
+    Return the [start, end) timestamps of calendar day `day` in `tz`.
+    """
+    day_start = pd.Timestamp(day, tz=tz).normalize()
+    return day_start, day_start + pd.Timedelta(days=1)
+
+
+def _stl_resid_frame(df_hist, stl_period):
+    """
+    STL residuals of every column (one fit per column).
+    """
+    resid = pd.DataFrame(index=df_hist.index)
+
+    for c in df_hist.columns:
+        resid[c] = _stl_resid(df_hist[c], stl_period)
+
+    return resid
+
+
+def _day_features(df, df_hist, X, day_start, day_end, quantiles, spike_pctl):
+    """
+    Slice the hourly features `X` to the target day and add calendar
+    context plus day-level statistics per column (see `analyze_day`).
+    """
+
+    # --- Keep only target day
+    day_features = X.loc[day_start:day_end].dropna()
+
+    # Day-level statistics are collected here (name -> scalar) and written
+    # together with the hourly features into one float32 array at the end
+    extra = {}
+
+    # --- Calendar context
+    calendar = pd.DataFrame(
+        {"weekday": day_features.index.weekday, "hour": day_features.index.hour},
+        index=day_features.index,
+    )
+
+    # --- Day-level distribution and spike/ramp metrics per column
+    day_slice = df.loc[day_start:day_end]
+
+    # --- Row ranges of the lagged days, [start, end) via binary search on the sorted index
+    lag24_rows = slice(*df.index.searchsorted(
+        [day_start - pd.Timedelta(hours=24), day_end - pd.Timedelta(hours=24)]
+    ))
+    lag168_rows = slice(*df.index.searchsorted(
+        [day_start - pd.Timedelta(hours=168), day_end - pd.Timedelta(hours=168)]
+    ))
+
+    if not day_features.empty:
+        # (hours, C) arrays; every statistic below covers all columns at once
+        D = day_slice[df.columns].to_numpy(dtype=np.float64)
+        H = df_hist[df.columns].to_numpy(dtype=np.float64)
+
+        with warnings.catch_warnings(), np.errstate(divide="ignore", invalid="ignore"):
+            # All-NaN columns just yield NaN statistics
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+
+            n_day = (~np.isnan(D)).sum(axis=0)
+
+            day_mean = np.nanmean(D, axis=0)
+            day_min = np.nanmin(D, axis=0)
+            day_max = np.nanmax(D, axis=0)
+            q_vals = np.nanquantile(D, quantiles, axis=0)
+            neg_share = (D < 0).sum(axis=0) / n_day
+
+            spike_thr = np.nanquantile(H, spike_pctl, axis=0)
+            spike_share = np.where(
+                np.isnan(spike_thr), np.nan, (D > spike_thr).sum(axis=0) / n_day
+            )
+
+            # Hour-to-hour changes between consecutive observed values
+            # (as Series.dropna().diff()): diff the forward-filled values
+            # and drop steps that land on a missing hour
+            D_ffill = pd.DataFrame(D).ffill().to_numpy()
+            ramp = np.diff(D_ffill, axis=0)
+            ramp[np.isnan(D[1:])] = np.nan
+            ramp_mean = np.nanmean(ramp, axis=0)
+            ramp_std = np.nanstd(ramp, axis=0, ddof=1)
+            ramp_max_abs = np.nanmax(np.abs(ramp), axis=0)
+
+            # Lag features for the target day
+            lag24_mean = np.nanmean(
+                df.iloc[lag24_rows].to_numpy(dtype=np.float64), axis=0
+            )
+            lag168_mean = np.nanmean(
+                df.iloc[lag168_rows].to_numpy(dtype=np.float64), axis=0
+            )
+
+            day_vs_lag24 = day_mean - lag24_mean
+            day_vs_lag168 = day_mean - lag168_mean
+
+        for j, c in enumerate(df.columns):
+            extra[f"{c}_day_mean"] = day_mean[j]
+            extra[f"{c}_day_min"] = day_min[j]
+            extra[f"{c}_day_max"] = day_max[j]
+            extra[f"{c}_day_q{int(quantiles[0]*100)}"] = q_vals[0, j]
+            extra[f"{c}_day_q{int(quantiles[1]*100)}"] = q_vals[1, j]
+            extra[f"{c}_day_q{int(quantiles[2]*100)}"] = q_vals[2, j]
+            extra[f"{c}_neg_share"] = neg_share[j]
+            extra[f"{c}_spike_share"] = spike_share[j]
+            extra[f"{c}_ramp_mean"] = ramp_mean[j]
+            extra[f"{c}_ramp_std"] = ramp_std[j]
+            extra[f"{c}_ramp_max_abs"] = ramp_max_abs[j]
+            extra[f"{c}_lag24_mean"] = lag24_mean[j]
+            extra[f"{c}_lag168_mean"] = lag168_mean[j]
+            extra[f"{c}_day_vs_lag24"] = day_vs_lag24[j]
+            extra[f"{c}_day_vs_lag168"] = day_vs_lag168[j]
+
+    # One preallocated float32 array for the hourly features and the
+    # (broadcast) day-level statistics, plus one int32 block for the
+    # calendar columns: two blocks in total, and the float columns form a
+    # single C-contiguous slab (e.g. drop weekday/hour before .to_numpy())
+    n_hourly = day_features.shape[1]
+    values = np.empty(
+        (len(day_features), n_hourly + len(extra)), dtype=np.float32
+    )
+    values[:, :n_hourly] = day_features.to_numpy()
+    values[:, n_hourly:] = np.fromiter(
+        extra.values(), dtype=np.float64, count=len(extra)
+    )
+
+    floats = pd.DataFrame(
+        values,
+        index=day_features.index,
+        columns=list(day_features.columns) + list(extra),
+        copy=False,
+    )
+
+    # Documented column order: hourly features, weekday, hour, day-level
+    columns = list(day_features.columns) + list(calendar.columns) + list(extra)
+    day_features = pd.concat([floats, calendar], axis=1)[columns]
+
+    return day_features
+
+
+def _analyze_bounds(
+    df, day_start, day_end, w, stl_period, history_hours, quantiles, spike_pctl
+):
+    """
+    Features for the day [day_start, day_end) of the normalized frame `df`,
+    using only the `history_hours` up to the end of that day.
+    """
+
+    # --- Use history window up to end of day
+    hist_start = day_end - pd.Timedelta(hours=history_hours)
+    df_hist = df.loc[hist_start:day_end]
+
+    # --- STL residuals
+    resid = _stl_resid_frame(df_hist, stl_period)
+
+    # --- Feature extraction
+    X = extract_features_df(resid, w=w)
+
+    return _day_features(
+        df, df_hist, X, day_start, day_end, quantiles, spike_pctl
+    )
+
+
 def analyze_day(
     df,
     day,
@@ -172,89 +459,18 @@ def analyze_day(
     Returns
     -------
     day_features : pd.DataFrame
-        Features for the selected day (hourly).
+        Features for the selected day (hourly). All feature columns are
+        float32; the calendar columns weekday and hour are int32.
     """
 
     # --- Normalize to DataFrame and timezone
-    if isinstance(df, pd.Series):
-        df = df.to_frame(name=getattr(df, "name", "value"))
-
-    if df.index.tz is None:
-        df = df.tz_localize(tz)
-    else:
-        df = df.tz_convert(tz)
-
-    day_ts = pd.Timestamp(day, tz=tz)
-    day_start = day_ts.normalize()
-    day_end = day_start + pd.Timedelta(days=1)
-
-    # --- Use history window up to end of day
-    hist_start = day_end - pd.Timedelta(hours=history_hours)
-    df_hist = df.loc[hist_start:day_end]
-
-    # --- STL residuals
-    resid = pd.DataFrame(index=df_hist.index)
-
-    for c in df_hist.columns:
-        stl = STL(df_hist[c], period=stl_period, robust=True)
-        resid[c] = stl.fit().resid
-
-    # --- Feature extraction
-    X = extract_features_df(resid, w=w)
-
-    # --- Keep only target day
-    day_features = X.loc[day_start:day_end].dropna().copy()
-
-    # --- Calendar context
-    day_features["weekday"] = day_features.index.weekday
-    day_features["hour"] = day_features.index.hour
-
-    # --- Day-level distribution and spike/ramp metrics per column
-    day_slice = df.loc[day_start:day_end]
-
-    if not day_features.empty:
-        for c in df.columns:
-            s_day = day_slice[c].dropna()
-            s_hist = df_hist[c].dropna()
+    df = _normalize_frame(df, tz)
+    day_start, day_end = _day_bounds(day, tz)
 
-            q_vals = s_day.quantile(quantiles) if len(s_day) else pd.Series([np.nan] * len(quantiles))
-            neg_share = (s_day < 0).mean() if len(s_day) else np.nan
-
-            spike_thr = s_hist.quantile(spike_pctl) if len(s_hist) else np.nan
-            spike_share = (s_day > spike_thr).mean() if spike_thr == spike_thr else np.nan
-
-            ramp = s_day.diff()
-            ramp_mean = ramp.mean() if len(ramp) else np.nan
-            ramp_std = ramp.std() if len(ramp) else np.nan
-            ramp_max_abs = ramp.abs().max() if len(ramp) else np.nan
-
-            # Lag features for the target day
-            lag24_vals = df.loc[(df.index >= day_start - pd.Timedelta(hours=24)) & 
-                               (df.index < day_end - pd.Timedelta(hours=24)), c].dropna()
-            lag168_vals = df.loc[(df.index >= day_start - pd.Timedelta(hours=168)) & 
-                                (df.index < day_end - pd.Timedelta(hours=168)), c].dropna()
-            
-            lag24_mean = lag24_vals.mean() if len(lag24_vals) else np.nan
-            lag168_mean = lag168_vals.mean() if len(lag168_vals) else np.nan
-            
-            day_vs_lag24 = (s_day.mean() - lag24_mean) if len(s_day) and lag24_mean == lag24_mean else np.nan
-            day_vs_lag168 = (s_day.mean() - lag168_mean) if len(s_day) and lag168_mean == lag168_mean else np.nan
-
-            day_features[f"{c}_day_mean"] = s_day.mean() if len(s_day) else np.nan
-            day_features[f"{c}_day_min"] = s_day.min() if len(s_day) else np.nan
-            day_features[f"{c}_day_max"] = s_day.max() if len(s_day) else np.nan
-            day_features[f"{c}_day_q{int(quantiles[0]*100)}"] = q_vals.iloc[0]
-            day_features[f"{c}_day_q{int(quantiles[1]*100)}"] = q_vals.iloc[1]
-            day_features[f"{c}_day_q{int(quantiles[2]*100)}"] = q_vals.iloc[2]
-            day_features[f"{c}_neg_share"] = neg_share
-            day_features[f"{c}_spike_share"] = spike_share
-            day_features[f"{c}_ramp_mean"] = ramp_mean
-            day_features[f"{c}_ramp_std"] = ramp_std
-            day_features[f"{c}_ramp_max_abs"] = ramp_max_abs
-            day_features[f"{c}_lag24_mean"] = lag24_mean
-            day_features[f"{c}_lag168_mean"] = lag168_mean
-            day_features[f"{c}_day_vs_lag24"] = day_vs_lag24
-            day_features[f"{c}_day_vs_lag168"] = day_vs_lag168
+    day_features = _analyze_bounds(
+        df, day_start, day_end, w, stl_period, history_hours,
+        quantiles, spike_pctl
+    )
 
     """
     day_features DataFrame Structure:
@@ -262,7 +478,8 @@ def analyze_day(
     
     24 rows (one per hour of the target day, indexed by timestamp)
     
-    For each price column (e.g., "value"), the following features are included:
+    For each price column (e.g., "value"), the following features are included
+    (all float32; only the calendar columns weekday/hour are int32):
     
     === Hourly Rolling Features (from extract_features_df on STL residuals) ===
     {col}_mean              : Rolling mean over w hours (baseline level)
@@ -314,4 +531,83 @@ def analyze_day(
     {col}_day_vs_lag168     : Today's avg - Last week's avg (weekly seasonality)
     """
 
-    return day_features
\ No newline at end of file
+    return day_features
+
+def analyze_range(
+    df,
+    days,
+    w=48,
+    stl_period=24,
+    tz="UTC",
+    history_hours=24 * 30,
+    quantiles=(0.1, 0.5, 0.9),
+    spike_pctl=0.95,
+    shared_fit=False
+):
+    """
+    Analyze several days, optionally sharing one STL fit between them.
+
+    By default every day gets its own STL fit and feature extraction over
+    the `history_hours` ending at that day, exactly like calling
+    `analyze_day` per day (no work is saved beyond normalizing the input
+    once).
+
+    With `shared_fit=True`, STL and `extract_features_df` run once over the
+    union window (first day's history through the last day) and each day
+    is sliced out of that single fit. This avoids one STL fit per day but
+    is NOT equivalent to `analyze_day`: STL smooths in both directions and
+    the dow/hour baseline and EWMA centring span the whole window, so each
+    day's hourly features depend on data after that day and can differ
+    substantially from `analyze_day`. Use it for exploratory or
+    retrospective analysis only, not for causal anomaly scoring. The
+    day-level statistics are unaffected.
+
+    Parameters
+    ----------
+    df : pd.Series or pd.DataFrame
+        Full dataset (DatetimeIndex, hourly).
+    days : iterable of str or pd.Timestamp
+        Days to analyze (YYYY-MM-DD).
+    w, stl_period, tz, history_hours, quantiles, spike_pctl :
+        Same as `analyze_day`.
+    shared_fit : bool
+        Fit STL once over the union window instead of once per day
+        (faster, non-causal; see above).
+
+    Returns
+    -------
+    features : dict
+        Maps each day's start timestamp (in ascending order) to its
+        feature DataFrame (same columns as `analyze_day`).
+    """
+
+    df = _normalize_frame(df, tz)
+    bounds = sorted(_day_bounds(day, tz) for day in days)
+
+    if not shared_fit:
+        return {
+            day_start: _analyze_bounds(
+                df, day_start, day_end, w, stl_period, history_hours,
+                quantiles, spike_pctl
+            )
+            for day_start, day_end in bounds
+        }
+
+    if not bounds:
+        return {}
+
+    # --- One STL fit and feature extraction over the union window
+    span_start = bounds[0][1] - pd.Timedelta(hours=history_hours)
+    span_end = bounds[-1][1]
+    resid = _stl_resid_frame(df.loc[span_start:span_end], stl_period)
+    X = extract_features_df(resid, w=w)
+
+    features = {}
+    for day_start, day_end in bounds:
+        hist_start = day_end - pd.Timedelta(hours=history_hours)
+        df_hist = df.loc[hist_start:day_end]
+        features[day_start] = _day_features(
+            df, df_hist, X, day_start, day_end, quantiles, spike_pctl
+        )
+
+    return features
@@ -1,15 +1,38 @@
 # imports
+import functools
 import pandas as pd
-import numpy as np
 import os
 import volue_insight_timeseries
-from dotenv import load_dotenv
-import matplotlib.pyplot as plt
+from concurrent.futures import ThreadPoolExecutor
+
+
+@functools.lru_cache(maxsize=1)
+def _load_env():
+    """
+    Load the .env file into the environment (once per process).
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+@functools.lru_cache(maxsize=4)
+def _session(cid: str, csecret: str):
+    """
+    Create (and cache) an authenticated session for a set of credentials.
+    """
+    return volue_insight_timeseries.Session(
+        client_id=cid,
+        client_secret=csecret
+    )
 
 
 def initialize_session(client_id: str = None, client_secret: str = None):
     """
     Initialize and return a Volue Insight API session.
+
+    The session is cached per (client_id, client_secret), so repeated
+    calls reuse it instead of authenticating again.
     
     Args:
         client_id: API client ID (defaults to env var VOLUE_CLIENT_ID)
@@ -19,18 +42,19 @@ def initialize_session(client_id: str = None, client_secret: str = None):
         volue_insight_timeseries.Session object
     """
     # Load from environment variables
-    load_dotenv()
-    cid = os.getenv("VOLUE_CLIENT_ID")
-    csecret = os.getenv("VOLUE_CLIENT_SECRET")
+    _load_env()
+    cid = client_id or os.getenv("VOLUE_CLIENT_ID")
+    csecret = client_secret or os.getenv("VOLUE_CLIENT_SECRET")
     
     if not cid or not csecret:
         raise ValueError("Missing VOLUE_CLIENT_ID or VOLUE_CLIENT_SECRET")
     
-    session = volue_insight_timeseries.Session(
-        client_id=cid,
-        client_secret=csecret
-    )
-    print("Authentication succeeded. Session returned.")
+    hits = _session.cache_info().hits
+    session = _session(cid, csecret)
+    if _session.cache_info().hits > hits:
+        print("Reusing cached session.")
+    else:
+        print("Authentication succeeded. Session returned.")
     return session
 
 def get_curve(session, curve_name: str):
@@ -66,6 +90,33 @@ def select_data(curve, data_from, data_to):
     print(f"Retrieved {len(df)} data points.")
     return df
 
+def select_data_many(curves, data_from, data_to, max_workers: int = 16):
+    """
+    Select time series data from several curves concurrently.
+
+    The requests are I/O-bound, so they are fanned out over a thread pool
+    instead of being fetched one after the other.
+    
+    Args:
+        curves: Curve objects from get_curve()
+        data_from: Start date (YYYY-MM-DD or timestamp)
+        data_to: End date (YYYY-MM-DD or timestamp)
+        max_workers: Maximum number of concurrent requests
+    
+    Returns:
+        list of pandas DataFrames, in the same order as curves
+    """
+    def fetch(curve):
+        ts = curve.get_data(data_from=data_from, data_to=data_to)
+        return ts.to_pandas()
+
+    curves = list(curves)
+    print(f"Selecting data for {len(curves)} curves from {data_from} to {data_to}...")
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        dfs = list(ex.map(fetch, curves))
+    print(f"Retrieved {sum(len(df) for df in dfs)} data points.")
+    return dfs
+
 # def select_instances(
 #     curve,
 #     issue_date_from: str,
@@ -114,7 +165,9 @@ def plot_dataframe(df):
     Args:
         df: pandas DataFrame with time series data
     """
-    
+    # matplotlib is only needed for plotting; keep it off the import path
+    import matplotlib.pyplot as plt
+
     print("Plotting data...")
     df.plot()
     plt.xlabel("Time")
@@ -0,0 +1,170 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "code"))
+
+from analysis_functions import (  # noqa: E402
+    analyze_day,
+    analyze_range,
+    extract_features_df,
+)
+
+
+def _hourly_frame(days=60, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range("2024-01-01", periods=24 * days, freq="h", tz="UTC")
+    hod = np.sin(2 * np.pi * idx.hour / 24)
+    return pd.DataFrame(
+        {
+            "a": 50 + 10 * hod + rng.normal(size=len(idx)),
+            "b": rng.normal(size=len(idx)).cumsum(),
+        },
+        index=idx,
+    )
+
+
+def _reference_features(df, w=24, z_thr=3.0, ewma_alpha=0.1):
+    """
+    Original per-column pandas rolling implementation of extract_features_df.
+    """
+    features = []
+    for col in df.columns:
+        s = df[col].astype(float)
+        f = pd.DataFrame(index=s.index)
+        roll = s.rolling(w)
+
+        f["mean"] = roll.mean()
+        f["std"] = roll.std()
+        f["mad"] = roll.apply(
+            lambda x: np.median(np.abs(x - np.median(x))), raw=True
+        )
+        f["q25"] = roll.quantile(0.25)
+        f["q75"] = roll.quantile(0.75)
+        f["iqr"] = f["q75"] - f["q25"]
+
+        z = (s - f["mean"]) / f["std"]
+        f["z_abs"] = z.abs()
+        f["anomaly_rate"] = (
+            z.abs().rolling(w).apply(lambda x: (x > z_thr).mean(), raw=True)
+        )
+        f["rz_abs"] = ((s - roll.median()) / (1.4826 * f["mad"])).abs()
+
+        f["vol_rolling"] = f["std"]
+        f["vol_ewma"] = s.sub(s.mean()).abs().ewm(alpha=ewma_alpha).mean()
+
+        f["acf1"] = roll.apply(lambda x: pd.Series(x).autocorr(lag=1))
+        f["acf2"] = roll.apply(lambda x: pd.Series(x).autocorr(lag=2))
+
+        f["lag24"] = s.shift(24)
+        f["lag168"] = s.shift(168)
+        f["lag24_delta"] = s.diff(24)
+        f["lag168_delta"] = s.diff(168)
+
+        dow_hour = s.index.to_series().apply(lambda t: (t.weekday(), t.hour))
+        f["dow_hour_z"] = 0.0
+        for _, idx_group in s.groupby(dow_hour).groups.items():
+            if len(idx_group) > 1:
+                group_vals = s.loc[idx_group]
+                group_std = group_vals.std()
+                if group_std > 0:
+                    f.loc[idx_group, "dow_hour_z"] = (
+                        (group_vals - group_vals.mean()) / group_std
+                    )
+
+        f["mean_shift"] = f["mean"].diff().abs()
+
+        f.columns = [f"{col}_{c}" for c in f.columns]
+        features.append(f)
+
+    return pd.concat(features, axis=1)
+
+
+def _features_input(kind):
+    df = _hourly_frame(days=40, seed=1)
+    if kind == "nan":
+        df.iloc[100:105, 0] = np.nan
+        df.iloc[600, 1] = np.nan
+    elif kind == "constant":
+        # Flat and capped runs; column "b" (a random walk) is left alone
+        # because pandas' running variance itself drifts off zero there
+        df.iloc[200:260, 0] = 0.1
+        df.iloc[500:530, 0] = 65.0
+    return df
+
+
+@pytest.mark.parametrize("kind", ["clean", "nan", "constant"])
+@pytest.mark.parametrize("w", [5, 24])
+def test_extract_features_df_matches_rolling_reference(kind, w):
+    df = _features_input(kind)
+
+    expected = _reference_features(df, w=w)
+    result = extract_features_df(df, w=w)
+
+    assert list(result.columns) == list(expected.columns)
+    pdt.assert_index_equal(result.index, expected.index)
+    for c in expected.columns:
+        np.testing.assert_allclose(
+            result[c].to_numpy(np.float64),
+            expected[c].to_numpy(np.float64),
+            rtol=1e-5, atol=1e-5, equal_nan=True, err_msg=c,
+        )
+
+
+def test_analyze_range_matches_analyze_day():
+    df = _hourly_frame()
+    days = ["2024-02-12", "2024-02-10", "2024-02-11"]
+
+    result = analyze_range(df, days)
+
+    assert list(result) == sorted(pd.Timestamp(d, tz="UTC") for d in days)
+    for day in days:
+        pdt.assert_frame_equal(
+            result[pd.Timestamp(day, tz="UTC")], analyze_day(df, day)
+        )
+
+
+def test_analyze_range_ignores_data_after_each_day():
+    df = _hourly_frame()
+    day = "2024-02-10"
+    days = [day, "2024-02-20"]
+
+    changed = df.copy()
+    changed.loc["2024-02-11 01:00":] *= 3
+
+    before = analyze_range(df, days)[pd.Timestamp(day, tz="UTC")]
+    after = analyze_range(changed, days)[pd.Timestamp(day, tz="UTC")]
+
+    assert not before.empty
+    pdt.assert_frame_equal(before, after)
+
+
+def test_analyze_range_shared_fit_fits_stl_once(monkeypatch):
+    import analysis_functions
+
+    df = _hourly_frame()
+    days = ["2024-02-10", "2024-02-11", "2024-02-12"]
+
+    calls = []
+    stl_resid = analysis_functions._stl_resid
+
+    def counting_stl_resid(s, period):
+        calls.append(s.name)
+        return stl_resid(s, period)
+
+    monkeypatch.setattr(analysis_functions, "_stl_resid", counting_stl_resid)
+
+    shared = analyze_range(df, days, shared_fit=True)
+    assert len(calls) == len(df.columns)
+
+    calls.clear()
+    exact = analyze_range(df, days)
+    assert len(calls) == len(days) * len(df.columns)
+
+    for day_start, day_features in shared.items():
+        assert list(day_features.columns) == list(exact[day_start].columns)
+        assert not day_features.empty